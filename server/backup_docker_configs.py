@@ -1,238 +1,861 @@
 #!/usr/bin/env python3
 
 import os
+import sys
+import argparse
+import json
+import stat
+import ctypes
+import errno
+import fnmatch
+import heapq
 import shutil
 import logging
+import logging.handlers
+import tarfile
 import zipfile # Added for zipping
+import functools
+import contextlib
 import subprocess # Added for running shell commands
 import time # Added for sleep
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
-# --- Configuration ---
+# --- Configuration (defaults; each can be overridden on the command line) ---
 # Directory containing the Docker config folders to back up
 SOURCE_CONFIG_DIR = "/home/danny/config"
-# Mounted directory where backups should be stored (temporary location before zipping)
-BACKUP_DEST_DIR = "/mnt/titan/Backups/docker_config/temp"
+# Mounted directory where backup archives should be stored
+BACKUP_DEST_DIR = "/mnt/titan/Backups/docker_config"
+# Local directory the archive is built in before being moved onto the (network) destination
+SCRATCH_DIR = "/var/tmp"
 # Base directory containing the corresponding Docker Compose project folders
 DOCKER_REPO_DIR = "/home/danny/docker" # Example: /path/to/docker/compose/projects
 # Log file location
 LOG_FILE = "/home/danny/logs/docker_config_backup.log"
 # Number of backups to keep
 MAX_BACKUPS = 7
+# Maximum number of directories walked (and Docker projects stopped/started) concurrently
+MAX_WORKERS = 8
+# zstd compression level used for .tar.zst archives (zstd uses all cores via -T0). zstd's own default:
+# already faster than DEFLATE at a similar ratio; high levels cost many times more CPU on a small server
+ZSTD_LEVEL = 3
+# Maximum seconds to wait for stopped containers to release their files before retrying
+LOCK_WAIT_TIMEOUT = 10
+# Paths passed to each fuser invocation, keeping its argument list far below the kernel's limit
+FUSER_BATCH_SIZE = 256
+# Buffer size used when copying file data into the archive
+COPY_BUFFER_SIZE = 1 << 20
+# Manifest of (size, mtime, ctime) per archived path from the last fully successful backup
+MANIFEST_FILENAME = "docker_configs_manifest.json"
+# Log records buffered in memory before being written to the log file (errors flush immediately)
+LOG_BUFFER_CAPACITY = 1024
+# Name of the manifest inside each archive, so restores stay self-contained
+MANIFEST_ARCNAME = ".backup_manifest.json"
+# Archive suffixes produced by this script, newest format first (.zip is the fallback without zstd)
+BACKUP_SUFFIXES = (".tar.zst", ".zip")
+# Directory names that are never descended into (caches and VCS metadata, not configuration)
+IGNORE_DIRS = frozenset({"node_modules", ".git", "__pycache__"})
+# File name patterns that are never archived. SQLite '-wal' files are deliberately kept: they can
+# hold committed data that hasn't been checkpointed yet, whereas '-shm' is rebuilt on open.
+IGNORE_GLOBS = ("*.sock", "*.pid", "*-shm")
 # --- End Configuration ---
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
+# statx(2) lets us ask for cached metadata only (AT_STATX_DONT_SYNC), which avoids a round-trip
+# to the server on network mounts like /mnt/titan where a plain stat() revalidates attributes.
+# The answer may be stale, so it's only used for start-up checks that don't decide anything irreversible.
+AT_FDCWD = -100
+AT_STATX_DONT_SYNC = 0x4000
+STATX_TYPE = 0x0001
+
+
+class _StatxBuf(ctypes.Structure):
+    # Only the fields up to stx_mode are read; the rest of the 256-byte struct statx is padding here
+    _fields_ = [
+        ("stx_mask", ctypes.c_uint32),
+        ("stx_blksize", ctypes.c_uint32),
+        ("stx_attributes", ctypes.c_uint64),
+        ("stx_nlink", ctypes.c_uint32),
+        ("stx_uid", ctypes.c_uint32),
+        ("stx_gid", ctypes.c_uint32),
+        ("stx_mode", ctypes.c_uint16),
+        ("_spare", ctypes.c_uint8 * (256 - 30)),
     ]
-)
+
+
+def _load_statx():
+    """Returns libc's statx function, or None where it isn't available (non-Linux, glibc < 2.28)."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        statx = ctypes.CDLL(None, use_errno=True).statx
+    except (OSError, AttributeError):
+        return None
+    statx.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_uint, ctypes.POINTER(_StatxBuf)]
+    statx.restype = ctypes.c_int
+    return statx
+
+
+_statx = _load_statx()
+
+
+def _file_type(path):
+    """Returns the S_IFMT bits of path (following symlinks), or None if it can't be stat'ed."""
+    if _statx is not None:
+        buf = _StatxBuf()
+        if _statx(AT_FDCWD, os.fsencode(path), AT_STATX_DONT_SYNC, STATX_TYPE, ctypes.byref(buf)) == 0:
+            if buf.stx_mask & STATX_TYPE:
+                return stat.S_IFMT(buf.stx_mode)
+        elif ctypes.get_errno() not in (errno.ENOSYS, errno.EPERM):
+            # A real lookup failure (ENOENT, EACCES, ...); ENOSYS/EPERM mean statx itself is blocked
+            return None
+    try:
+        return stat.S_IFMT(os.stat(path).st_mode)
+    except (OSError, ValueError):
+        return None
+
+
+def fast_is_dir(path):
+    """os.path.isdir() that only consults cached metadata where the kernel supports it."""
+    return _file_type(path) == stat.S_IFDIR
+
 
 def rotate_backups(backup_dir, max_to_keep):
     """Rotates backups in the specified directory, keeping only the newest max_to_keep."""
-    logging.info(f"Checking backup rotation in directory: {backup_dir}")
+    if max_to_keep < 1:
+        # Keeping none would delete the backup that was just created
+        logging.error("Refusing to rotate backups with a limit of %s; at least 1 must be kept.", max_to_keep)
+        return
+    logging.info("Checking backup rotation in directory: %s", backup_dir)
     try:
-        # Find backup files matching the pattern
-        backup_files = [
-            f for f in os.listdir(backup_dir)
-            if os.path.isfile(os.path.join(backup_dir, f)) and
-               f.startswith("docker_configs_backup_") and f.endswith(".zip")
-        ]
+        # Find backup files matching the pattern, with their modification times, in one pass
+        with os.scandir(backup_dir) as it:
+            backup_files = [
+                (entry.stat(follow_symlinks=False).st_mtime, entry.name) for entry in it
+                if entry.name.startswith("docker_configs_backup_") and entry.name.endswith(BACKUP_SUFFIXES) and
+                   entry.is_file()
+            ]
 
         if len(backup_files) <= max_to_keep:
-            logging.info(f"Found {len(backup_files)} backups, which is within the limit of {max_to_keep}. No rotation needed.")
+            logging.info("Found %s backups, which is within the limit of %s. No rotation needed.", len(backup_files), max_to_keep)
             return
 
-        logging.info(f"Found {len(backup_files)} backups. Need to remove {len(backup_files) - max_to_keep} oldest ones.")
-
-        # Sort files alphabetically (timestamp format ensures chronological order)
-        backup_files.sort()
+        logging.info("Found %s backups. Need to remove %s oldest ones.", len(backup_files), len(backup_files) - max_to_keep)
 
-        # Identify files to delete
-        files_to_delete = backup_files[:-max_to_keep] # All except the last 'max_to_keep' files
+        # Pick the oldest by modification time (robust to clock/timezone drift in the filename timestamps);
+        # ties fall back to the name. Only the files to delete are ordered, not the whole list.
+        files_to_delete = heapq.nsmallest(len(backup_files) - max_to_keep, backup_files)
 
-        for filename in files_to_delete:
+        for _, filename in files_to_delete:
             filepath = os.path.join(backup_dir, filename)
             try:
                 os.remove(filepath)
-                logging.info(f"Successfully deleted old backup: {filename}")
+                logging.info("Successfully deleted old backup: %s", filename)
             except OSError as e:
-                logging.error(f"Failed to delete old backup '{filename}': {e}")
+                logging.error("Failed to delete old backup '%s': %s", filename, e)
 
     except FileNotFoundError:
-        logging.error(f"Backup directory '{backup_dir}' not found during rotation check.")
+        logging.error("Backup directory '%s' not found during rotation check.", backup_dir)
     except Exception as e:
-        logging.error(f"An error occurred during backup rotation: {e}")
+        logging.error("An error occurred during backup rotation: %s", e)
+
+
+class _SequentialWriter:
+    """Write-only file wrapper that refuses to seek.
+
+    zipfile then streams each entry with a data descriptor instead of seeking back to patch its
+    local header, so the archive is written strictly sequentially (seeks are costly on network mounts).
+    """
+
+    def __init__(self, fp):
+        self._fp = fp
+
+    def write(self, data):
+        return self._fp.write(data)
+
+    def flush(self):
+        self._fp.flush()
+
+    def tell(self):
+        return self._fp.tell()
+
+    def seek(self, *args):
+        raise OSError(errno.ESPIPE, "Sequential archive output does not support seeking")
+
+
+# posix_fadvise isn't available on every platform (e.g. macOS); the hints are purely advisory
+_HAVE_FADVISE = hasattr(os, "posix_fadvise")
+
+
+def _drop_cache(fd):
+    """Tells the kernel a file's cached pages won't be needed again."""
+    if _HAVE_FADVISE:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+@contextlib.contextmanager
+def _open_source(path):
+    """Opens a source file for one sequential read, keeping it from lingering in the page cache.
+
+    The config tree is read exactly once per run, so there's no point evicting the Docker
+    workloads' cached data to hold on to it.
+    """
+    with open(path, 'rb') as src:
+        if _HAVE_FADVISE:
+            os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        yield src
+        _drop_cache(src.fileno())
+
+
+class _ArchiveWriteError(Exception):
+    """Writing to the archive itself failed (a broken zstd pipe, a full disk, ...), so it can't be finished."""
+
+
+@contextlib.contextmanager
+def _archive_writes():
+    """Turns OSErrors raised while writing the archive into _ArchiveWriteError.
+
+    Callers treat OSError as "this source file couldn't be read" and move on to the next entry,
+    which must not happen once the archive stream itself is broken.
+    """
+    try:
+        yield
+    except OSError as e:
+        raise _ArchiveWriteError(f"Writing to the archive failed: {e}") from e
+
+
+class _PaddedReader:
+    """Reads exactly size bytes of a source file for an archive member whose header is already written.
+
+    Data missing because the file shrank or a read failed is replaced with zeros rather than raised,
+    which would leave the archive misaligned; the problem is kept in error for the caller to report.
+    """
+
+    def __init__(self, src, size):
+        self._src = src
+        self._remaining = size
+        self.error = None
+
+    def read(self, size=-1):
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = b""
+        if self.error is None:
+            try:
+                data = self._src.read(size)
+            except OSError as e:
+                self.error = e
+                data = b""
+            if len(data) < size and self.error is None:
+                self.error = OSError(errno.EIO, "File shrank while being archived")
+        self._remaining -= size
+        if len(data) < size:
+            data += bytes(size - len(data))
+        return data
+
+
+def _tar_add(tar, path, arcname):
+    """Adds a single file, directory or symlink entry (never recursing) to a tar stream.
+
+    A regular file's header is built from the opened file and always followed by exactly the size
+    it declares. If the file shrinks or fails mid-read, its member is zero-padded and an OSError is
+    raised afterwards, so it's retried like any unreadable file; the retried copy is a later member
+    with the same name, which wins on extraction.
+    """
+    if not stat.S_ISREG(os.lstat(path).st_mode):
+        tarinfo = tar.gettarinfo(path, arcname)
+        if tarinfo is None:
+            # Sockets and other types tar can't represent
+            logging.debug("  - Skipping unsupported file type: %s", path)
+            return
+        with _archive_writes():
+            tar.addfile(tarinfo)
+        return
+    with _open_source(path) as src:
+        # fstat of the open file, so the size can't change between the stat and the open
+        tarinfo = tar.gettarinfo(arcname=arcname, fileobj=src)
+        data = _PaddedReader(src, tarinfo.size)
+        with _archive_writes():
+            tar.addfile(tarinfo, data)
+    if data.error is not None:
+        raise data.error
+
+
+def _zip_add(zf, path, arcname):
+    """Adds a single file, directory or symlink entry to a streaming zip, copying data in large chunks."""
+    st = os.lstat(path)
+    if stat.S_ISLNK(st.st_mode):
+        # Stored like Info-ZIP does: the link mode in the Unix attributes and the target as the data,
+        # so the zip keeps links as links, the same as the tar format
+        zinfo = zipfile.ZipInfo(arcname, max(time.localtime(st.st_mtime)[:6], (1980, 1, 1, 0, 0, 0)))
+        zinfo.create_system = 3 # Unix, so external_attr holds the mode
+        zinfo.external_attr = st.st_mode << 16
+        target = os.fsencode(os.readlink(path))
+        with _archive_writes():
+            zf.writestr(zinfo, target)
+        return
+    zinfo = zipfile.ZipInfo.from_file(path, arcname, strict_timestamps=False)
+    if zinfo.is_dir():
+        zinfo.CRC = zinfo.compress_size = 0
+        with _archive_writes():
+            zf.mkdir(zinfo)
+        return
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    # Open the source first so a vanished file fails before any header is written
+    with _open_source(path) as src:
+        data = _PaddedReader(src, os.fstat(src.fileno()).st_size)
+        with _archive_writes(), zf.open(zinfo, 'w', force_zip64=True) as dst:
+            shutil.copyfileobj(data, dst, COPY_BUFFER_SIZE)
+    if data.error is not None:
+        raise data.error
+
+
+@contextlib.contextmanager
+def _open_archive(archive_base, zstd_level=ZSTD_LEVEL):
+    """Opens the backup archive for writing and yields (archive_path, add_entry).
+
+    Prefers a tar stream compressed by an external multi-threaded zstd so compression scales with
+    the number of cores, falling back to a single-threaded zip when zstd isn't installed.
+    add_entry(path, arcname) adds a single file, directory or symlink entry (never recursing).
+    zstd_level is the zstd compression level for the tar stream.
+    """
+    zstd = shutil.which("zstd")
+    if zstd is None:
+        archive_path = f"{archive_base}.zip"
+        logging.warning("zstd not found in PATH. Falling back to single-threaded zip compression.")
+        with open(archive_path, 'xb') as raw:
+            with zipfile.ZipFile(_SequentialWriter(raw), 'w', compression=zipfile.ZIP_DEFLATED,
+                                 allowZip64=True) as zf:
+                yield archive_path, functools.partial(_zip_add, zf)
+            # The finished archive is only read back on restore
+            raw.flush()
+            _drop_cache(raw.fileno())
+        return
+
+    archive_path = f"{archive_base}.tar.zst"
+    zstd_proc = subprocess.Popen([zstd, "-q", f"-{zstd_level}", "-T0", "-o", archive_path], stdin=subprocess.PIPE)
+    try:
+        with tarfile.open(fileobj=zstd_proc.stdin, mode='w|', copybufsize=COPY_BUFFER_SIZE) as tar:
+            yield archive_path, functools.partial(_tar_add, tar)
+    finally:
+        try:
+            zstd_proc.stdin.close()
+        except BrokenPipeError:
+            # zstd already exited; the error being raised or its exit status below reports why
+            pass
+        returncode = zstd_proc.wait()
+    if returncode != 0:
+        raise RuntimeError(f"zstd exited with status {returncode}")
+
+
+def _collect_entries(path, arcname, entries, manifest):
+    """Walks a directory, appending (path, arcname, is_dir) tuples for everything that should be archived.
+
+    Records (size, mtime_ns, ctime_ns) for every entry in manifest, keyed by arcname, so runs can be
+    compared without reading any file data. Returns (path, arcname, True) tuples for directories
+    that could not be read so they can be retried.
+    """
+    try:
+        with os.scandir(path) as it:
+            children = list(it)
+        st = os.stat(path, follow_symlinks=False)
+    except OSError as e:
+        logging.warning("  - Failed to read directory: %s due to: %s", path, e)
+        return [(path, arcname, True)]
+
+    entries.append((path, arcname, True))
+    manifest[arcname] = [st.st_size, st.st_mtime_ns, st.st_ctime_ns]
+
+    # Visit children in inode order, which roughly follows on-disk layout and cuts seeking when the
+    # files are read on a cold cache. DirEntry.inode() comes from the directory read, so this is free.
+    children.sort(key=lambda entry: entry.inode())
+
+    failed = []
+    for entry in children:
+        entry_arcname = os.path.join(arcname, entry.name)
+        if entry.is_dir(follow_symlinks=False):
+            if entry.name in IGNORE_DIRS:
+                logging.debug("Skipping ignored directory: %s", entry.path)
+                continue
+            failed.extend(_collect_entries(entry.path, entry_arcname, entries, manifest))
+        elif entry.is_file(follow_symlinks=False) or entry.is_symlink():
+            # Symlinks (to files, directories or nothing at all) are archived as the links themselves,
+            # the way copytree(symlinks=True) copied them
+            if any(fnmatch.fnmatchcase(entry.name, pattern) for pattern in IGNORE_GLOBS):
+                logging.debug("Skipping ignored file: %s", entry.path)
+                continue
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                # File removed while we were walking; nothing to back up
+                continue
+            entries.append((entry.path, entry_arcname, False))
+            manifest[entry_arcname] = [st.st_size, st.st_mtime_ns, st.st_ctime_ns]
+        else:
+            # Sockets, FIFOs and device nodes can't be archived meaningfully
+            logging.debug("Skipping special file: %s", entry.path)
+    return failed
+
 
+def _archive_entries(add_entry, entries):
+    """Writes collected (path, arcname, is_dir) entries into the open archive.
 
-def backup_configs():
-    """Copies configuration folders from SOURCE_CONFIG_DIR to BACKUP_DEST_DIR."""
+    Returns the entries that could not be read so they can be retried. A failure writing the
+    archive itself (_ArchiveWriteError) isn't caught here and aborts the whole archive.
+    """
+    failed = []
+    for path, arcname, is_dir in entries:
+        try:
+            add_entry(path, arcname)
+        except FileNotFoundError:
+            # File removed since the walk; nothing to back up
+            logging.debug("Skipping missing file: %s", path)
+        except OSError as e:
+            logging.warning("  - Failed to archive file: %s due to: %s", path, e)
+            failed.append((path, arcname, is_dir))
+    return failed
+
+
+def _load_manifest(manifest_path):
+    """Returns the manifest saved by the last fully successful backup, or None if there isn't one."""
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            previous = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.warning("Ignoring unreadable backup manifest '%s': %s", manifest_path, e)
+        return None
+    # Valid JSON of the wrong shape is treated like unreadable JSON
+    if not isinstance(previous, dict) or not isinstance(previous.get("archive", ""), str):
+        logging.warning("Ignoring malformed backup manifest '%s'.", manifest_path)
+        return None
+    return previous
+
+
+def _backup_one(add_entry, item_name, entries, walk_failed):
+    """Archives the collected entries of a single config directory.
+
+    Returns the failed paths that need a retry with the container stopped.
+    """
+    logging.info("Attempting to back up directory: %s", item_name)
+    failed = walk_failed + _archive_entries(add_entry, entries)
+    if failed:
+        logging.error("Initial archive failed for %s path(s) in directory '%s'.", len(failed), item_name)
+    else:
+        logging.info("Successfully backed up directory: %s", item_name)
+    return failed
+
+
+def _retry_paths(add_entry, item_name, failed, manifest):
+    """Retries the failed paths of one directory, returning True if all of them were archived."""
+    # Only the paths that failed are retried; everything else is already in the archive
+    logging.info("Retrying %s path(s) for '%s'...", len(failed), item_name)
+    entries = []
+    still_failed = []
+    for path, arcname, is_dir in failed:
+        if is_dir and arcname not in manifest:
+            # The directory couldn't be read at all during the walk, so walk it now
+            still_failed.extend(_collect_entries(path, arcname, entries, manifest))
+        else:
+            entries.append((path, arcname, is_dir))
+    still_failed.extend(_archive_entries(add_entry, entries))
+    if still_failed:
+        logging.error("Retry failed for %s path(s) in directory '%s'.", len(still_failed), item_name)
+        return False
+    logging.info("Successfully backed up directory '%s' on retry.", item_name)
+    return True
+
+
+def _run_compose(item_name, docker_project_path, *compose_args):
+    """Runs `docker compose <compose_args>` in the project directory, returning True on success."""
+    command = " ".join(("docker", "compose") + compose_args)
+    logging.info("Running '%s' in: %s", command, docker_project_path)
+    try:
+        result = subprocess.run(["docker", "compose", *compose_args], cwd=docker_project_path,
+                                check=True, capture_output=True, text=True)
+        logging.info("Successfully ran '%s' for '%s'. Output:\n%s", command, item_name, result.stdout)
+        return True
+    except subprocess.CalledProcessError as err:
+        logging.error("'%s' failed for '%s'. Error:\n%s", command, item_name, err.stderr)
+    except FileNotFoundError:
+        logging.error("docker compose command not found. Is Docker installed and in PATH?")
+    except Exception as ex:
+        logging.error("An unexpected error occurred while running '%s' for '%s': %s", command, item_name, ex)
+    return False
+
+
+def _paths_in_use(paths):
+    """Returns True if fuser reports a process using any of paths, checking them in batches."""
+    # fuser exits 0 if any process is using any of the paths it was given
+    return any(
+        subprocess.run(["fuser", "-s", *paths[start:start + FUSER_BATCH_SIZE]], stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL).returncode == 0
+        for start in range(0, len(paths), FUSER_BATCH_SIZE)
+    )
+
+
+def wait_for_unlock(paths, timeout=LOCK_WAIT_TIMEOUT):
+    """Waits until no process has any of paths open, polling fuser for at most timeout seconds.
+
+    Returns True once the paths are free and False on timeout. If fuser can't be run (e.g. it
+    isn't installed), sleeps for the rest of the timeout as a fixed grace period instead and
+    returns None, since nothing was actually checked.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            in_use = _paths_in_use(paths)
+        except OSError as e:
+            reason = "fuser command not found" if isinstance(e, FileNotFoundError) else f"Could not run fuser: {e}"
+            logging.warning("%s. Waiting %s seconds for file locks to release...", reason, timeout)
+            time.sleep(max(0, deadline - time.monotonic()))
+            return None
+        if not in_use:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.25)
+
+
+def discover_docker_projects(docker_repo_dir):
+    """Returns the names of the Docker Compose project folders in docker_repo_dir.
+
+    One scandir answers every membership check, instead of a stat per failed directory.
+    """
+    try:
+        with os.scandir(docker_repo_dir) as it:
+            return frozenset(entry.name for entry in it if entry.is_dir())
+    except OSError as e:
+        logging.error("Failed to list Docker project directory '%s': %s", docker_repo_dir, e)
+        return frozenset()
+
+
+def _retry_with_containers_stopped(add_entry, failed_by_item, manifest, docker_repo_dir):
+    """Stops the containers of the failed directories, retries their failed paths and restarts them.
+
+    Stops and restarts run concurrently across projects, with a single wait for file locks in
+    between; the retries themselves write into the archive from this thread, one directory at a
+    time in name order. Returns the names of directories fully backed up on retry.
+    """
+    docker_projects = discover_docker_projects(docker_repo_dir)
+    projects = {}
+    for item_name in sorted(failed_by_item):
+        docker_project_path = os.path.join(docker_repo_dir, item_name)
+        if item_name in docker_projects:
+            projects[item_name] = docker_project_path
+        else:
+            logging.warning("Docker project directory not found for '%s' at '%s'. Skipping stop/retry/start.", item_name, docker_project_path)
+
+    recovered = set()
+    if not projects:
+        return recovered
+
+    logging.info("Attempting Docker stop/retry/start for: %s", ', '.join(projects))
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(projects))) as executor:
+        try:
+            # --- Stop Containers ---
+            stop_futures = {
+                item_name: executor.submit(_run_compose, item_name, docker_project_path, "stop")
+                for item_name, docker_project_path in projects.items()
+            }
+            stopped = [item_name for item_name, future in stop_futures.items() if future.result()]
+
+            if stopped:
+                # --- Wait (once for all containers) ---
+                locked_paths = [path for item_name in stopped for path, _, _ in failed_by_item[item_name]]
+                logging.info("Waiting up to %s seconds for file locks to release...", LOCK_WAIT_TIMEOUT)
+                unlocked = wait_for_unlock(locked_paths)
+                if unlocked:
+                    logging.info("File locks released.")
+                elif unlocked is None:
+                    logging.info("File locks could not be checked. Retrying after the grace period.")
+                else:
+                    logging.warning("Some files are still in use. Retrying anyway.")
+
+                # --- Retry Failed Paths ---
+                recovered.update(item_name for item_name in stopped
+                                 if _retry_paths(add_entry, item_name, failed_by_item[item_name], manifest))
+        finally:
+            # --- Restart Containers (always attempt if stop was attempted, even if the retry failed) ---
+            start_futures = [
+                executor.submit(_run_compose, item_name, docker_project_path, "up", "-d")
+                for item_name, docker_project_path in projects.items()
+            ]
+            for future in start_futures:
+                future.result()
+
+    return recovered
+
+
+def backup_configs(args):
+    """Archives configuration folders from args.source into a compressed archive in args.dest."""
+    source_dir = args.source
+    dest_dir = args.dest
     logging.info("Starting Docker config backup...")
-    logging.info(f"Source directory: {SOURCE_CONFIG_DIR}")
-    logging.info(f"Destination directory: {BACKUP_DEST_DIR}")
+    logging.info("Source directory: %s", source_dir)
+    logging.info("Destination directory: %s", dest_dir)
 
-    if not os.path.isdir(SOURCE_CONFIG_DIR):
-        logging.error(f"Source directory '{SOURCE_CONFIG_DIR}' not found or is not a directory.")
+    if not fast_is_dir(source_dir):
+        logging.error("Source directory '%s' not found or is not a directory.", source_dir)
         return
 
-    if not os.path.isdir(BACKUP_DEST_DIR):
-        logging.warning(f"Backup destination directory '{BACKUP_DEST_DIR}' not found. Attempting to create it.")
+    if not fast_is_dir(dest_dir):
+        logging.warning("Backup destination directory '%s' not found. Attempting to create it.", dest_dir)
         try:
-            os.makedirs(BACKUP_DEST_DIR, exist_ok=True)
-            logging.info(f"Successfully created backup destination directory: {BACKUP_DEST_DIR}")
+            os.makedirs(dest_dir, exist_ok=True)
+            logging.info("Successfully created backup destination directory: %s", dest_dir)
         except OSError as e:
-            logging.error(f"Failed to create backup destination directory '{BACKUP_DEST_DIR}': {e}")
+            logging.error("Failed to create backup destination directory '%s': %s", dest_dir, e)
             return
 
+    # d_type from the directory read tells us which entries are directories without an extra stat each
+    with os.scandir(source_dir) as it:
+        item_names = [entry.name for entry in it if entry.is_dir(follow_symlinks=False)]
+
+    if not item_names:
+        logging.info("No directories were found to back up, skipping archive creation.")
+        return
+
+    # --- Walk Sources ---
+    # Collect every entry and its stat info up front; this touches metadata only, no file data.
+    # Each top-level directory is independent, so they are walked concurrently.
+    max_workers = min(MAX_WORKERS, len(item_names))
+    logging.info("Walking %s directories using %s worker threads.", len(item_names), max_workers)
+    manifest = {}
+    collected = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for item_name in item_names:
+            entries = []
+            futures[executor.submit(_collect_entries, os.path.join(source_dir, item_name),
+                                    item_name, entries, manifest)] = (item_name, entries)
+        for future in as_completed(futures):
+            item_name, entries = futures[future]
+            collected[item_name] = (entries, future.result())
+
+    # --- Skip Unchanged ---
+    manifest_path = os.path.join(dest_dir, MANIFEST_FILENAME)
+    previous = _load_manifest(manifest_path)
+    # A plain stat, not fast_is_file: skipping relies on the archive really being there, and cached
+    # attributes on the network mount can still show one that another host has deleted or rotated
+    if (previous is not None and previous.get("files") == manifest and
+            os.path.isfile(os.path.join(dest_dir, previous.get("archive", "")))):
+        logging.info("No changes since the last backup (%s). Skipping archive creation.", previous['archive'])
+        return
+
     copied_count = 0
     error_count = 0
 
-    for item_name in os.listdir(SOURCE_CONFIG_DIR):
-        source_item_path = os.path.join(SOURCE_CONFIG_DIR, item_name)
-        dest_item_path = os.path.join(BACKUP_DEST_DIR, item_name)
+    # Build the archive on local disk so the network mount only sees one sequential transfer
+    scratch_dir = args.scratch_dir
+    if not fast_is_dir(scratch_dir):
+        logging.warning("Scratch directory '%s' not found. Writing the archive directly to the destination.",
+                        scratch_dir)
+        scratch_dir = dest_dir
 
-        if os.path.isdir(source_item_path):
-            logging.info(f"Attempting to back up directory: {item_name}")
-            try:
-                # Remove existing backup directory if it exists, to ensure a fresh copy
-                if os.path.exists(dest_item_path):
-                     # Use shutil.rmtree for directories
-                    if os.path.isdir(dest_item_path):
-                        shutil.rmtree(dest_item_path)
-                    # Use os.remove for files (though we expect directories here)
-                    elif os.path.isfile(dest_item_path):
-                         os.remove(dest_item_path)
-
-                # Copy the entire directory tree
-                shutil.copytree(source_item_path, dest_item_path, symlinks=True, ignore_dangling_symlinks=True)
-                logging.info(f"Successfully backed up directory: {item_name}")
-                copied_count += 1
-            except (shutil.Error, OSError) as e:
-                logging.error(f"Initial copy failed for directory '{item_name}': {e}")
-                logging.info(f"Attempting Docker stop/retry/start for '{item_name}'...")
-
-                docker_project_path = os.path.join(DOCKER_REPO_DIR, item_name)
-                container_stopped = False
-                retry_successful = False
-
-                if os.path.isdir(docker_project_path):
-                    # --- Stop Container ---
-                    logging.info(f"Attempting to stop container in: {docker_project_path}")
-                    stop_command = f"cd \"{docker_project_path}\" && docker compose stop"
-                    try:
-                        stop_result = subprocess.run(stop_command, shell=True, check=True, capture_output=True, text=True)
-                        logging.info(f"Successfully stopped container for '{item_name}'. Output:\n{stop_result.stdout}")
-                        container_stopped = True
-                    except subprocess.CalledProcessError as stop_err:
-                        logging.error(f"Failed to stop container for '{item_name}'. Error:\n{stop_err.stderr}")
-                    except FileNotFoundError:
-                         logging.error(f"docker compose command not found. Is Docker installed and in PATH?")
-                    except Exception as stop_ex:
-                         logging.error(f"An unexpected error occurred while stopping container for '{item_name}': {stop_ex}")
-
-
-                    if container_stopped:
-                        # --- Wait ---
-                        logging.info("Waiting 10 seconds for file locks to release...")
-                        time.sleep(10)
-
-                        # --- Retry Copy ---
-                        logging.info(f"Retrying copy for '{item_name}'...")
-                        try:
-                            # Ensure destination doesn't exist from partial first attempt
-                            if os.path.exists(dest_item_path):
-                                if os.path.isdir(dest_item_path):
-                                    shutil.rmtree(dest_item_path)
-                                else:
-                                    os.remove(dest_item_path)
-                            shutil.copytree(source_item_path, dest_item_path, symlinks=True, ignore_dangling_symlinks=True)
-                            logging.info(f"Successfully backed up directory '{item_name}' on retry.")
-                            copied_count += 1 # Count success here
-                            retry_successful = True
-                        except (shutil.Error, OSError) as retry_e:
-                            logging.error(f"Retry copy failed for directory '{item_name}': {retry_e}")
-                            # Log specific file errors if available
-                            if isinstance(retry_e, shutil.Error) and hasattr(retry_e, 'args') and len(retry_e.args) > 0 and isinstance(retry_e.args[0], list):
-                                for src, dst, error_msg in retry_e.args[0]:
-                                    logging.warning(f"  - Failed to copy file on retry: {src} due to: {error_msg}")
-                            error_count += 1 # Count error only if retry fails
-
-                    # --- Restart Container (always attempt if stop was attempted) ---
-                    logging.info(f"Attempting to restart container in: {docker_project_path}")
-                    start_command = f"cd \"{docker_project_path}\" && docker compose up -d"
-                    try:
-                        start_result = subprocess.run(start_command, shell=True, check=True, capture_output=True, text=True)
-                        logging.info(f"Successfully restarted container for '{item_name}'. Output:\n{start_result.stdout}")
-                    except subprocess.CalledProcessError as start_err:
-                        logging.error(f"Failed to restart container for '{item_name}'. Error:\n{start_err.stderr}")
-                    except FileNotFoundError:
-                         logging.error(f"docker compose command not found. Is Docker installed and in PATH?")
-                    except Exception as start_ex:
-                         logging.error(f"An unexpected error occurred while restarting container for '{item_name}': {start_ex}")
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    archive_base = os.path.join(scratch_dir, f"docker_configs_backup_{timestamp}")
+    archive_path = None
+    manifest_tmp_path = f"{manifest_path}.tmp"
 
+    # Stream every file straight into the final archive instead of copying to a temp tree first
+    try:
+        with _open_archive(archive_base, args.zstd_level) as (archive_path, add_entry):
+            logging.info("Creating archive: %s", archive_path)
+            # An archive takes one writer at a time, so the entries are written from this thread only,
+            # directory by directory in name order; the parallel part is the metadata walk above (and,
+            # for .tar.zst, the compression done by zstd's own threads)
+            failed_by_item = {}
+            for item_name in sorted(collected):
+                entries, walk_failed = collected[item_name]
+                failed = _backup_one(add_entry, item_name, entries, walk_failed)
+                if failed:
+                    failed_by_item[item_name] = failed
                 else:
-                    logging.warning(f"Docker project directory not found for '{item_name}' at '{docker_project_path}'. Skipping stop/retry/start.")
-                    error_count += 1 # Count initial error if we can't attempt retry
+                    copied_count += 1
+
+            if failed_by_item and args.docker_retry:
+                recovered = _retry_with_containers_stopped(add_entry, failed_by_item, manifest, args.docker_repo)
+                copied_count += len(recovered)
+                error_count += len(failed_by_item) - len(recovered)
+            else:
+                error_count += len(failed_by_item)
+
+            # Store the manifest inside the archive too, so restores stay self-contained
+            with open(manifest_tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"archive": os.path.basename(archive_path), "files": manifest}, f)
+            add_entry(manifest_tmp_path, MANIFEST_ARCNAME)
+    except Exception as e:
+        logging.error("Failed to create archive '%s': %s", archive_path or archive_base, e)
+        for path in (archive_path, manifest_tmp_path):
+            if path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        return
+
+    # --- Move Into Place ---
+    final_path = os.path.join(dest_dir, os.path.basename(archive_path))
+    if final_path != archive_path:
+        # Copy under a temporary name first so a partial transfer never looks like a finished backup
+        partial_path = f"{final_path}.part"
+        logging.info("Attempting to move archive to: %s", final_path)
+        try:
+            shutil.move(archive_path, partial_path)
+        except OSError as e:
+            # shutil.move only removes the source once the copy is complete
+            logging.error("Failed to move archive to '%s': %s. The archive was left at '%s'.",
+                          final_path, e, archive_path)
+            for path in (partial_path, manifest_tmp_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return
+        try:
+            os.replace(partial_path, final_path)
+        except OSError as e:
+            # The scratch copy is already gone, so the complete '.part' file is the only copy left
+            logging.error("Failed to rename archive to '%s': %s. The archive was left at '%s'.",
+                          final_path, e, partial_path)
+            try:
+                os.remove(manifest_tmp_path)
+            except OSError:
+                pass
+            return
+        archive_path = final_path
 
+    # Only a complete backup may be used to skip later runs
+    try:
+        if error_count == 0:
+            os.replace(manifest_tmp_path, manifest_path)
         else:
-            logging.debug(f"Skipping non-directory item: {item_name}")
+            os.remove(manifest_tmp_path)
+    except OSError as e:
+        logging.error("Failed to update backup manifest '%s': %s", manifest_path, e)
 
     logging.info("--------------------")
     logging.info("Backup process finished.")
-    logging.info(f"Directories successfully backed up: {copied_count}")
-    logging.info(f"Directories with errors: {error_count}")
+    logging.info("Directories successfully backed up: %s", copied_count)
+    logging.info("Directories with errors: %s", error_count)
+    logging.info("Successfully created archive: %s", archive_path)
 
-    # --- Zipping and Cleanup ---
-    if copied_count > 0 or error_count > 0: # Only zip if something was attempted
-        logging.info("Attempting to create zip archive...")
+    # --- Rotate Backups ---
+    if args.rotate:
         try:
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            # Place the zip file in the parent directory of BACKUP_DEST_DIR
-            backup_parent_dir = os.path.dirname(BACKUP_DEST_DIR)
-            zip_filename_base = f"docker_configs_backup_{timestamp}"
-            zip_filepath_base = os.path.join(backup_parent_dir, zip_filename_base)
-
-            logging.info(f"Creating archive: {zip_filepath_base}.zip")
-            # shutil.make_archive creates the archive.
-            # Parameters: base_name, format, root_dir
-            # base_name: path to the file to create, excluding format-specific extension (e.g., '.zip')
-            # format: 'zip', 'tar', 'gztar', 'bztar', or 'xztar'
-            # root_dir: directory that will be the root of the archive. All paths in the archive will be relative to this.
-            archive_path = shutil.make_archive(
-                base_name=zip_filepath_base,
-                format='zip',
-                root_dir=BACKUP_DEST_DIR
-            )
-            logging.info(f"Successfully created archive: {archive_path}")
-
-            # --- Rotate Backups ---
-            try:
-                rotate_backups(backup_parent_dir, MAX_BACKUPS)
-            except Exception as rotation_e:
-                # Log rotation errors but don't stop the script
-                logging.error(f"An error occurred during backup rotation: {rotation_e}")
-
-            # Cleanup: Remove the original backup directory after successful zipping
-            try:
-                logging.info(f"Attempting to remove original backup directory: {BACKUP_DEST_DIR}")
-                shutil.rmtree(BACKUP_DEST_DIR)
-                logging.info(f"Successfully removed original backup directory: {BACKUP_DEST_DIR}")
-            except OSError as e:
-                logging.error(f"Failed to remove original backup directory '{BACKUP_DEST_DIR}': {e}")
-
-        except Exception as e:
-            logging.error(f"Failed to create or cleanup zip archive: {e}")
-    else:
-        logging.info("No directories were processed, skipping zip creation.")
+            rotate_backups(dest_dir, args.max_backups)
+        except Exception as rotation_e:
+            # Log rotation errors but don't stop the script
+            logging.error("An error occurred during backup rotation: %s", rotation_e)
 
     logging.info("--------------------")
     logging.info("Backup script finished.")
     logging.info("--------------------")
 
 
+def setup_logging(log_file):
+    """Configures logging to both the log file and the console.
+
+    File records are batched through a MemoryHandler so worker threads don't each pay for a
+    write to the log file; anything at ERROR or above is flushed straight away.
+    """
+    log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setFormatter(log_formatter)
+    buffered_file_handler = logging.handlers.MemoryHandler(
+        LOG_BUFFER_CAPACITY,
+        flushLevel=logging.ERROR,
+        target=file_handler
+    )
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            buffered_file_handler,
+            logging.StreamHandler()
+        ]
+    )
+
+
+def _positive_int(value):
+    """argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Back up Docker config directories into a compressed, rotated archive.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--source",
+        default=SOURCE_CONFIG_DIR,
+        help="Directory containing the Docker config folders to back up."
+    )
+    parser.add_argument(
+        "--dest",
+        default=BACKUP_DEST_DIR,
+        help="Directory where backup archives are stored."
+    )
+    parser.add_argument(
+        "--scratch-dir",
+        default=SCRATCH_DIR,
+        help="Local directory the archive is built in before being moved to --dest."
+    )
+    parser.add_argument(
+        "--docker-repo",
+        default=DOCKER_REPO_DIR,
+        help="Directory containing the Docker Compose project folders matching each config folder."
+    )
+    parser.add_argument(
+        "--log-file",
+        default=LOG_FILE,
+        help="Path of the log file."
+    )
+    parser.add_argument(
+        "--max-backups",
+        type=_positive_int,
+        default=MAX_BACKUPS,
+        help="Number of backups to keep when rotating."
+    )
+    parser.add_argument(
+        "--rotate",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Delete the oldest backups beyond --max-backups after a successful run."
+    )
+    parser.add_argument(
+        "--zstd-level",
+        type=int,
+        choices=range(1, 20),
+        metavar="LEVEL",
+        default=ZSTD_LEVEL,
+        help="zstd compression level (1-19) for .tar.zst archives; higher levels are much slower."
+    )
+    parser.add_argument(
+        "--docker-retry",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Stop a project's containers and retry when some of its files can't be read."
+    )
+    args = parser.parse_args()
+
+    setup_logging(args.log_file)
+    try:
+        backup_configs(args)
+    finally:
+        # Flush any buffered records to the log file
+        logging.shutdown()
+
+
 if __name__ == "__main__":
     print("Executing backup script...") # Added for debugging linter issues
-    backup_configs()
+    main()
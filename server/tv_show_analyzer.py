@@ -1,96 +1,277 @@
 #!/usr/bin/env python3
 
 import os
+import sys
 import re
 import argparse
-from collections import defaultdict
+import ctypes
+import errno
+import json
+import queue
+import atexit
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import logging.handlers
 import datetime
+from itertools import groupby, islice
+from operator import itemgetter
 from typing import Tuple, Dict, List, Optional, Set
 
 # Common video file extensions
-VIDEO_EXTENSIONS = {'.mkv', '.mp4', '.avi', '.mov', '.wmv', '.flv'}
+VIDEO_EXTENSIONS = frozenset({'.mkv', '.mp4', '.avi', '.mov', '.wmv', '.flv'})
+# The same extensions as a tuple for str.endswith, plus the longest one for the mixed-case fallback
+VIDEO_SUFFIXES = tuple(VIDEO_EXTENSIONS)
+VIDEO_SUFFIX_MAX_LEN = max(len(ext) for ext in VIDEO_EXTENSIONS)
+
+# Default number of threads reading show folders ahead of the analysis (the work is I/O-bound)
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Format version of the --cache-file contents; caches with another version are ignored
+CACHE_VERSION = 1
+
+# renameat2(2) with RENAME_NOREPLACE moves a file only if the destination doesn't exist, checked
+# atomically in the same syscall; a plain os.rename() silently replaces a same-named file.
+AT_FDCWD = -100
+RENAME_NOREPLACE = 1
 
 # Global logger instance (configured in main)
 logger = logging.getLogger(__name__)
 
-# Regex to find S##E## pattern (case-insensitive)
-SEASON_EPISODE_REGEX = re.compile(r'[._\s-]S(\d{1,2})E(\d{1,3})[._\s-]', re.IGNORECASE)
-# Regex to find just the season pattern for loose files (e.g., S01, s02)
-SEASON_ONLY_REGEX = re.compile(r'[._\s-]S(\d{1,2})[._\s-]', re.IGNORECASE)
-# Regex for season folders
-SEASON_FOLDER_REGEX = re.compile(r'^Season (\d+)$', re.IGNORECASE)
+# Regex to find S##E## or just S## tokens (case-insensitive). The separators are lookarounds so
+# consecutive tokens (e.g. '.S01.S01E02.') are all found by a single finditer pass.
+SEASON_EPISODE_REGEX = re.compile(r'(?<=[._\s-])S(\d{1,2})(?:E(\d{1,3}))?(?=[._\s-])', re.IGNORECASE)
+# Prefix of season folder names ('Season 1', 'season 02', ...), compared case-insensitively
+SEASON_FOLDER_PREFIX = 'season '
 
 def is_video_file(filename):
     """Check if a filename has a common video extension."""
-    return os.path.splitext(filename)[1].lower() in VIDEO_EXTENSIONS
-
-def parse_season_episode(filename):
-    """Extract (season, episode) numbers from filename using S##E## pattern."""
-    match = SEASON_EPISODE_REGEX.search(filename)
-    if match:
-        return int(match.group(1)), int(match.group(2))
-    return None, None
-
-def parse_season_only(filename):
-    """Extract season number from filename using S## pattern."""
-    match = SEASON_ONLY_REGEX.search(filename)
-    if match:
-        return int(match.group(1))
+    # endswith(tuple) allocates nothing; only names not already lowercase pay for lowering their tail
+    return (filename.endswith(VIDEO_SUFFIXES) or
+            filename[-VIDEO_SUFFIX_MAX_LEN:].lower().endswith(VIDEO_SUFFIXES))
+
+def parse_season_folder(name):
+    """Extract the season number from a 'Season X' folder name, or None if it isn't one."""
+    # Plain string checks; most folders that aren't seasons fail on the length or prefix
+    prefix_len = len(SEASON_FOLDER_PREFIX)
+    if len(name) > prefix_len and name[:prefix_len].casefold() == SEASON_FOLDER_PREFIX:
+        number = name[prefix_len:]
+        if number.isdecimal():
+            return int(number)
     return None
 
-def get_release_tag(filename, season, episode):
-    """Attempt to extract a consistent part of the filename after S##E##."""
-    match = SEASON_EPISODE_REGEX.search(filename)
-    if match:
-        # Return the portion after the S##E## match
-        return filename[match.end():].strip().lower()
-    return filename.lower() # Fallback if pattern not found
+def parse_filename(filename):
+    """
+    Extract (season, episode, release_tag) from filename in a single regex pass.
+    Uses the first S##E## token; the release tag is the portion after it (and its separator).
+    Without an S##E## token, returns the first S## season (if any) with episode and tag None.
+    """
+    # Every token starts with an S (matched case-insensitively, which includes the long s 'ſ'),
+    # and a substring test is far cheaper than a regex scan that finds nothing
+    if 'S' not in filename and 's' not in filename and 'ſ' not in filename:
+        return None, None, None
+    season = None
+    for match in SEASON_EPISODE_REGEX.finditer(filename):
+        if match.group(2) is not None:
+            return int(match.group(1)), int(match.group(2)), filename[match.end() + 1:].strip().lower()
+        if season is None:
+            season = int(match.group(1))
+    return season, None, None
+
+def _load_renameat2():
+    """Returns libc's renameat2 function, or None where it isn't available (non-Linux, glibc < 2.28)."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return None
+    renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    renameat2.restype = ctypes.c_int
+    return renameat2
+
+
+_renameat2 = _load_renameat2()
+
+
+def _rename_no_replace(source_path: str, destination_path: str):
+    """Move source_path to destination_path, raising FileExistsError rather than overwriting an existing file."""
+    if _renameat2 is not None:
+        if _renameat2(AT_FDCWD, os.fsencode(source_path), AT_FDCWD, os.fsencode(destination_path), RENAME_NOREPLACE) == 0:
+            return
+        err = ctypes.get_errno()
+        # ENOSYS/EINVAL mean the kernel or filesystem doesn't support the flag, EPERM that renameat2 is blocked
+        if err not in (errno.ENOSYS, errno.EINVAL, errno.EPERM):
+            raise OSError(err, os.strerror(err), source_path, None, destination_path)
+    # Fallback: check first, then rename (not atomic, but still never overwrites a file that was already there)
+    if os.path.lexists(destination_path):
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), source_path, None, destination_path)
+    os.rename(source_path, destination_path)
+
 
 # --- Analysis Functions ---
 
-def analyze_season_organization(show_path: str, args: argparse.Namespace) -> bool:
+def _scan_show(show_path: str) -> Tuple[List[str], List[Tuple[int, str, str]]]:
+    """
+    Read a show folder once and classify its entries.
+    Returns a tuple: (loose_videos, season_folders).
+    - loose_videos: Names of video files directly in the show folder.
+    - season_folders: (season_num, folder_name, folder_path) for each 'Season X' folder, sorted by name.
+    """
+    loose_videos: List[str] = []
+    season_folders: List[Tuple[int, str, str]] = []
+    # DirEntry.is_file()/is_dir() use the type from the directory read, so no extra stat per item
+    with os.scandir(show_path) as it:
+        for entry in it:
+            if entry.is_file():
+                if is_video_file(entry.name):
+                    loose_videos.append(entry.name)
+            elif entry.is_dir():
+                season_num = parse_season_folder(entry.name)
+                if season_num is not None:
+                    season_folders.append((season_num, entry.name, entry.path))
+    season_folders.sort(key=lambda folder: folder[1]) # Sort for consistent order
+    return loose_videos, season_folders
+
+
+def _list_videos(folder_path: str) -> List[str]:
+    """
+    Return the names of the video files directly inside folder_path.
+    Other entries are dropped during the read, so prefetched listings waiting for analysis hold only the names it uses.
+    """
+    with os.scandir(folder_path) as it:
+        return [entry.name for entry in it if entry.is_file() and is_video_file(entry.name)]
+
+
+class ShowListing:
+    """Directory contents of a show folder, read ahead of its analysis (see _prefetch_show)."""
+    def __init__(self, loose_videos: List[str], season_folders: List[Tuple[int, str, str]]):
+        self.loose_videos = loose_videos
+        self.season_folders = season_folders
+        # File names per season folder path; folders that couldn't be read are missing
+        self.season_files: Dict[str, List[str]] = {}
+        # mtime (ns) of the show and season folders, taken before reading them; only recorded when
+        # results are cached, and None if any folder couldn't be read
+        self.mtimes: Optional[Dict[str, int]] = None
+
+
+def _mtimes_unchanged(mtimes: Dict[str, int]) -> bool:
+    """Check that every folder still has the mtime recorded for it."""
+    try:
+        return all(os.stat(path).st_mtime_ns == mtime_ns for path, mtime_ns in mtimes.items())
+    except OSError:
+        return False
+
+
+def _prefetch_show(show_path: str, cached_mtimes: Optional[Dict[str, int]] = None,
+                   record_mtimes: bool = False) -> Optional[ShowListing]:
+    """
+    Read a show folder and each of its season folders, for use from worker threads.
+    Returns None without reading anything if cached_mtimes shows none of the folders changed
+    (a folder's mtime changes whenever entries are added, removed or renamed in it).
+    Season folders that can't be read are left out so the analysis reads (and reports) them itself.
+    """
+    if cached_mtimes and _mtimes_unchanged(cached_mtimes):
+        return None
+    mtimes: Dict[str, int] = {}
+    if record_mtimes:
+        mtimes[show_path] = os.stat(show_path).st_mtime_ns
+    listing = ShowListing(*_scan_show(show_path))
+    complete = True
+    for _, _, folder_path in listing.season_folders:
+        try:
+            if record_mtimes:
+                mtimes[folder_path] = os.stat(folder_path).st_mtime_ns
+            listing.season_files[folder_path] = _list_videos(folder_path)
+        except OSError:
+            complete = False
+    if record_mtimes and complete:
+        listing.mtimes = mtimes
+    return listing
+
+
+def _load_cache(cache_file: str) -> Dict[str, dict]:
+    """Load cached show results from cache_file, keyed by show path. Returns {} if unusable."""
+    try:
+        with open(cache_file, encoding='utf-8') as f:
+            cache = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable cache file '%s': %s", cache_file, e)
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        logger.info("Ignoring cache file '%s' from a different version.", cache_file)
+        return {}
+    shows = cache.get("shows", {})
+    if not isinstance(shows, dict):
+        logger.warning("Ignoring malformed cache file '%s'.", cache_file)
+        return {}
+    # Drop entries without usable folder mtimes; the shows are simply analyzed again
+    return {show_path: entry for show_path, entry in shows.items()
+            if isinstance(entry, dict) and isinstance(entry.get("mtimes"), dict)}
+
+
+def _save_cache(cache_file: str, shows: Dict[str, dict]):
+    """Write cached show results to cache_file atomically."""
+    tmp_path = f"{cache_file}.tmp"
+    try:
+        cache_dir = os.path.dirname(cache_file)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_VERSION, "shows": shows}, f)
+        os.replace(tmp_path, cache_file)
+        logger.info("Saved analysis cache for %s show(s) to: %s", len(shows), cache_file)
+    except OSError as e:
+        logger.error("Failed to save cache file '%s': %s", cache_file, e)
+
+
+def analyze_season_organization(show_path: str, loose_videos: List[str], args: argparse.Namespace) -> Tuple[bool, bool]:
     """
     Identify video files needing season organization and optionally perform it interactively.
-    Returns True if potential organization is needed, False otherwise.
+    loose_videos are the video files found directly in the show folder (see _scan_show).
+    Returns a tuple: (needs_org, organized).
+    - needs_org: True if potential organization is needed, False otherwise.
+    - organized: True if the user confirmed and files were (attempted to be) moved into season folders.
     Logs details about needed organization.
     """
     show_name = os.path.basename(show_path)
     if args.verbose:
         print(f"\n--- Checking Season Organization ---")
-    logger.info(f"Checking season organization for: {show_name}")
-    files_to_organize: Dict[int, List[str]] = defaultdict(list)
-    organization_needed = False
+    logger.info("Checking season organization for: %s", show_name)
+    files_by_season: List[Tuple[int, str]] = []
+    organized = False
 
     try:
-        items_in_root = [item for item in os.listdir(show_path)
-                         if os.path.isfile(os.path.join(show_path, item))]
-
-        for item in items_in_root:
-            if is_video_file(item):
-                season, _ = parse_season_episode(item)
-                if season is None:
-                    # Try parsing just the season if S##E## fails
-                    season = parse_season_only(item)
-
-                if season is not None:
-                    files_to_organize[season].append(item)
-                    organization_needed = True
-                else:
-                    # Log files that look like videos but have no season info
-                    logger.debug(f"Could not determine season for loose file: {item} in {show_name}")
-
-        if not organization_needed:
+        for item in loose_videos:
+            # Falls back to a bare S## season if there's no S##E## token
+            season, _, _ = parse_filename(item)
+
+            if season is not None:
+                files_by_season.append((season, item))
+            else:
+                # Log files that look like videos but have no season info
+                logger.debug("Could not determine season for loose file: %s in %s", item, show_name)
+
+        if not files_by_season:
             if args.verbose:
                 print("  No loose video files needing season organization found.")
-            logger.info(f"No season organization needed for: {show_name}")
-            return False
+            logger.info("No season organization needed for: %s", show_name)
+            return False, False
+
+        # One sort orders both the seasons and the files within each season
+        files_by_season.sort()
+        files_to_organize: Dict[int, List[str]] = {
+            season_num: [item for _, item in group]
+            for season_num, group in groupby(files_by_season, key=itemgetter(0))
+        }
 
         # Log and potentially print details
         log_summary = [f"Potential Season Organization Needed for: {show_name}"]
         if args.verbose or args.interactive: # Show details if verbose or interactive
              print("  Potential Season Organization Needed:")
-        for season_num, files in sorted(files_to_organize.items()):
+        for season_num, files in files_to_organize.items():
             target_folder_name = f"Season {season_num}"
             file_count = len(files)
             # Print summary instead of individual files
@@ -104,24 +285,27 @@ def analyze_season_organization(show_path: str, args: argparse.Namespace) -> boo
             confirm = input(f"Perform organization for '{show_name}'? [y/N]: ").strip().lower()
             if confirm == 'y':
                 print(f"  Attempting organization for '{show_name}'...")
-                logger.info(f"User confirmed organization for: {show_name}")
+                logger.info("User confirmed organization for: %s", show_name)
+                organized = True
                 perform_organization(show_path, files_to_organize)
             else:
                 print(f"  Skipping organization for '{show_name}'.")
-                logger.info(f"User skipped organization for: {show_name}")
+                logger.info("User skipped organization for: %s", show_name)
 
-        return True # Organization was needed, even if not performed
+        return True, organized # Organization was needed, even if not performed
 
-    except FileNotFoundError:
-        logger.error(f"Show directory not found during organization check: {show_path}")
     except Exception as e:
-        logger.error(f"Error checking season organization for '{show_path}': {e}")
-    return False # Assume no organization needed on error
+        logger.error("Error checking season organization for '%s': %s", show_path, e)
+    return False, organized # Assume no organization needed on error
 
 
 def perform_organization(show_path: str, files_to_organize: Dict[int, List[str]]):
-    """Creates folders and moves files as specified."""
-    for season_num, files in sorted(files_to_organize.items()):
+    """
+    Creates folders and moves files as specified.
+    files_to_organize is processed in its own order; analyze_season_organization builds it sorted by
+    season and file name, so nothing is re-sorted here.
+    """
+    for season_num, files in files_to_organize.items():
         target_folder_name = f"Season {season_num}"
         target_folder_path = os.path.join(show_path, target_folder_name)
 
@@ -129,28 +313,35 @@ def perform_organization(show_path: str, files_to_organize: Dict[int, List[str]]
         try:
             os.makedirs(target_folder_path, exist_ok=True)
             print(f"    Created/Ensured folder: '{target_folder_name}'")
-            logger.info(f"Created/Ensured folder: '{target_folder_path}'")
+            logger.info("Created/Ensured folder: '%s'", target_folder_path)
         except Exception as e:
             print(f"    ERROR creating folder '{target_folder_name}': {e}")
-            logger.error(f"Failed to create folder '{target_folder_path}': {e}")
+            logger.error("Failed to create folder '%s': %s", target_folder_path, e)
             continue # Skip moving files if folder creation failed
 
         # Move files
-        for file in sorted(files):
+        for file in files:
             source_path = os.path.join(show_path, file)
             destination_path = os.path.join(target_folder_path, file)
             try:
-                os.rename(source_path, destination_path)
+                _rename_no_replace(source_path, destination_path)
                 print(f"      Moved: '{file}' -> '{target_folder_name}/'")
-                logger.info(f"Moved '{source_path}' to '{destination_path}'")
+                logger.info("Moved '%s' to '%s'", source_path, destination_path)
+            except FileExistsError:
+                print(f"      SKIPPED '{file}': '{target_folder_name}/' already has a file with that name")
+                logger.warning("Not moving '%s': '%s' already exists", source_path, destination_path)
             except Exception as e:
                 print(f"      ERROR moving file '{file}': {e}")
-                logger.error(f"Failed to move '{source_path}' to '{destination_path}': {e}")
+                logger.error("Failed to move '%s' to '%s': %s", source_path, destination_path, e)
 
 
-def analyze_existing_seasons(show_path: str, args: argparse.Namespace) -> Tuple[Dict[int, List[str]], Dict[int, str]]:
+def analyze_existing_seasons(show_path: str, season_folders: List[Tuple[int, str, str]],
+                             args: argparse.Namespace,
+                             season_files: Optional[Dict[str, List[str]]] = None) -> Tuple[Dict[int, List[str]], Dict[int, str]]:
     """
     Analyze existing 'Season X' folders for inconsistency and holes.
+    season_folders are the (season_num, folder_name, folder_path) tuples found by _scan_show;
+    season_files optionally holds already-read video file names per folder path (see _prefetch_show).
     Returns two dictionaries:
     - season_inconsistencies: {season_num: list_of_tags}
     - season_holes: {season_num: hole_description_string}
@@ -159,55 +350,47 @@ def analyze_existing_seasons(show_path: str, args: argparse.Namespace) -> Tuple[
     show_name = os.path.basename(show_path)
     if args.verbose:
         print(f"\n--- Analyzing Existing Season Folders ---")
-    logger.info(f"Analyzing existing seasons for: {show_name}")
-    season_folders_found = False
+    logger.info("Analyzing existing seasons for: %s", show_name)
     season_inconsistencies: Dict[int, List[str]] = {}
     season_holes: Dict[int, str] = {}
 
     try:
-        items = sorted(os.listdir(show_path)) # Sort for consistent order
-        for item in items:
-            item_path = os.path.join(show_path, item)
-            if os.path.isdir(item_path):
-                match = SEASON_FOLDER_REGEX.match(item)
-                if match:
-                    season_folders_found = True
-                    season_num = int(match.group(1))
-                    if args.verbose:
-                        print(f"\n  Analyzing Folder: '{item}' (Season {season_num})")
-                    logger.info(f"Analyzing folder: {item_path}")
-                    inconsistent_tags, hole_description = analyze_single_season_folder(item_path, season_num, args)
-
-                    if inconsistent_tags is not None:
-                        season_inconsistencies[season_num] = inconsistent_tags
-                    if hole_description is not None:
-                        season_holes[season_num] = hole_description
-
-        if not season_folders_found:
+        for season_num, item, item_path in season_folders:
+            if args.verbose:
+                print(f"\n  Analyzing Folder: '{item}' (Season {season_num})")
+            logger.info("Analyzing folder: %s", item_path)
+            items = season_files.get(item_path) if season_files else None
+            inconsistent_tags, hole_description = analyze_single_season_folder(item_path, season_num, args, items)
+
+            if inconsistent_tags is not None:
+                season_inconsistencies[season_num] = inconsistent_tags
+            if hole_description is not None:
+                season_holes[season_num] = hole_description
+
+        if not season_folders:
             if args.verbose:
                 print("  No 'Season X' folders found to analyze.")
-            logger.info(f"No 'Season X' folders found in {show_name}")
+            logger.info("No 'Season X' folders found in %s", show_name)
             # Return empty dicts if no seasons found
             return {}, {}
 
-    except FileNotFoundError:
-        logger.error(f"Show directory not found during season analysis: {show_path}")
-        return {}, {"error": f"Show directory not found: {show_path}"} # Indicate error
     except Exception as e:
-        logger.error(f"Error analyzing existing seasons for '{show_path}': {e}")
+        logger.error("Error analyzing existing seasons for '%s': %s", show_path, e)
         return {}, {"error": f"Error analyzing seasons: {e}"} # Indicate error
 
     # Determine overall status for logging summary
     all_consistent = not bool(season_inconsistencies)
     all_complete = not bool(season_holes)
-    logger.info(f"Finished analyzing existing seasons for: {show_name}. Consistent: {all_consistent}, Complete: {all_complete}")
+    logger.info("Finished analyzing existing seasons for: %s. Consistent: %s, Complete: %s", show_name, all_consistent, all_complete)
 
     return season_inconsistencies, season_holes
 
 
-def analyze_single_season_folder(season_path: str, season_num: int, args: argparse.Namespace) -> Tuple[Optional[List[str]], Optional[str]]:
+def analyze_single_season_folder(season_path: str, season_num: int, args: argparse.Namespace,
+                                 items: Optional[List[str]] = None) -> Tuple[Optional[List[str]], Optional[str]]:
     """
     Analyze a specific season folder for naming inconsistency and episode holes.
+    items optionally holds the folder's video file names if they were already read; otherwise the folder is listed.
     Returns a tuple: (inconsistent_tags, hole_description).
     - inconsistent_tags: List of tags if inconsistent, None otherwise.
     - hole_description: String describing holes if incomplete, None otherwise.
@@ -215,36 +398,35 @@ def analyze_single_season_folder(season_path: str, season_num: int, args: argpar
     """
     folder_name = os.path.basename(season_path)
     episodes: Dict[int, str] = {}
+    present_episodes = 0 # Bit e is set when episode e was found
     release_tags: Set[str] = set()
-    filenames: List[str] = []
     inconsistent_tags: Optional[List[str]] = None
     hole_description: Optional[str] = None
 
     try:
-        for item in os.listdir(season_path):
-            item_path = os.path.join(season_path, item)
-            if os.path.isfile(item_path) and is_video_file(item):
-                s, e = parse_season_episode(item)
-                filenames.append(item)
-                if s is not None and e is not None:
-                    if s != season_num:
-                        # Log season mismatch only if verbose or specifically debugging
-                        logger.warning(f"Mismatch: File '{item}' in {folder_name} has S{s:02d}E{e:02d}.")
-                        continue # Skip if season number in file doesn't match folder
-
-                    if e in episodes:
-                        logger.warning(f"Duplicate episode number {e} found in {folder_name}: '{item}' and '{episodes[e]}'")
-                    episodes[e] = item
-                    tag = get_release_tag(item, s, e)
-                    if tag: # Avoid adding empty tags if extraction fails
-                        release_tags.add(tag)
-                else:
-                     logger.debug(f"Could not parse S##E## from: '{item}' in {folder_name}")
+        if items is None:
+            items = _list_videos(season_path)
+        for item in items:
+            s, e, tag = parse_filename(item)
+            if s is not None and e is not None:
+                if s != season_num:
+                    # Log season mismatch only if verbose or specifically debugging
+                    logger.warning("Mismatch: File '%s' in %s has S%02dE%02d.", item, folder_name, s, e)
+                    continue # Skip if season number in file doesn't match folder
+
+                if e in episodes:
+                    logger.warning("Duplicate episode number %s found in %s: '%s' and '%s'", e, folder_name, item, episodes[e])
+                episodes[e] = item
+                present_episodes |= 1 << e
+                if tag: # Avoid adding empty tags if extraction fails
+                    release_tags.add(tag)
+            else:
+                logger.debug("Could not parse S##E## from: '%s' in %s", item, folder_name)
 
         if not episodes:
             if args.verbose:
                 print("    No valid episode files found in this season folder.")
-            logger.info(f"No valid episode files found in {folder_name}")
+            logger.info("No valid episode files found in %s", folder_name)
             # Considered complete if empty, but inconsistent might be debatable (let's say consistent)
             return True, True
 
@@ -255,28 +437,28 @@ def analyze_single_season_folder(season_path: str, season_num: int, args: argpar
             logger.warning(msg)
             # Log only the distinct tags found, not every filename
             sorted_tags = sorted(list(release_tags))
-            logger.warning(f"  Tags found: {', '.join(sorted_tags)}")
+            logger.warning("  Tags found: %s", ', '.join(sorted_tags))
             inconsistent_tags = sorted_tags
         else:
             if args.verbose: print(f"    ✅ Naming Consistency: Appears consistent.")
-            logger.info(f"Naming appears consistent in {folder_name}")
-
-        # 2. Season Hole Check
-        min_ep = min(episodes.keys())
-        max_ep = max(episodes.keys())
+            logger.info("Naming appears consistent in %s", folder_name)
 
         # 2. Season Hole Check
-        min_ep = min(episodes.keys())
-        max_ep = max(episodes.keys())
+        min_ep = (present_episodes & -present_episodes).bit_length() - 1 # Lowest set bit
+        max_ep = present_episodes.bit_length() - 1
 
         if len(episodes) == 1:
              if args.verbose: print(f"    ✅ Season Completeness: Only one episode (E{max_ep}) found.")
-             logger.info(f"Only one episode (E{max_ep}) found in {folder_name}")
+             logger.info("Only one episode (E%s) found in %s", max_ep, folder_name)
              # hole_description remains None
         else:
-            expected_episodes = set(range(1, max_ep + 1)) # Assume seasons start at 1
-            found_episodes = set(episodes.keys())
-            missing_episodes = sorted(list(expected_episodes - found_episodes))
+            # Assume seasons start at 1, so bit 0 (an E00 special) is never "missing"
+            missing_mask = ((1 << (max_ep + 1)) - 2) & ~present_episodes
+            missing_episodes = []
+            while missing_mask:
+                lowest_bit = missing_mask & -missing_mask
+                missing_episodes.append(lowest_bit.bit_length() - 1)
+                missing_mask ^= lowest_bit
 
             hole_messages = []
             log_hole_messages = []
@@ -290,7 +472,7 @@ def analyze_single_season_folder(season_path: str, season_num: int, args: argpar
 
             if not hole_messages:
                  if args.verbose: print(f"    ✅ Season Completeness: No episodes missing between 1-{max_ep}.")
-                 logger.info(f"No episodes missing between 1-{max_ep} in {folder_name}")
+                 logger.info("No episodes missing between 1-%s in %s", max_ep, folder_name)
                  # hole_description remains None
             else:
                  msg = f"Season Hole: {'; '.join(hole_messages)}"
@@ -301,10 +483,10 @@ def analyze_single_season_folder(season_path: str, season_num: int, args: argpar
 
 
     except FileNotFoundError:
-        logger.error(f"Season directory not found during analysis: {season_path}")
+        logger.error("Season directory not found during analysis: %s", season_path)
         return None, "Error: Directory not found" # Indicate error
     except Exception as e:
-        logger.error(f"Error analyzing season folder '{season_path}': {e}")
+        logger.error("Error analyzing season folder '%s': %s", season_path, e)
         return None, f"Error: {e}" # Indicate error
 
     return inconsistent_tags, hole_description
@@ -322,29 +504,76 @@ class ShowAnalysisResult:
         self.overall_consistent: bool = True
         self.overall_complete: bool = True
 
-def analyze_show(show_path: str, args: argparse.Namespace) -> ShowAnalysisResult:
-    """Runs all analyses for a single show folder and returns detailed results."""
+    def to_cache(self) -> dict:
+        """Return the result as JSON-serializable data (season numbers become string keys)."""
+        return {
+            "needs_org": self.needs_org,
+            "season_inconsistencies": self.season_inconsistencies,
+            "season_holes": self.season_holes,
+        }
+
+    @classmethod
+    def from_cache(cls, show_name: str, data: dict) -> 'ShowAnalysisResult':
+        """Rebuild a result from data produced by to_cache."""
+        result = cls(show_name)
+        result.needs_org = data["needs_org"]
+        result.season_inconsistencies = {int(k): v for k, v in data["season_inconsistencies"].items()}
+        result.season_holes = {int(k): v for k, v in data["season_holes"].items()}
+        result.overall_consistent = not bool(result.season_inconsistencies)
+        result.overall_complete = not bool(result.season_holes)
+        return result
+
+def analyze_show(show_path: str, args: argparse.Namespace,
+                 prefetched: Optional[ShowListing] = None) -> ShowAnalysisResult:
+    """
+    Runs all analyses for a single show folder and returns detailed results.
+    prefetched optionally holds the show's listings from _prefetch_show; otherwise they are read here.
+    """
     show_name = os.path.basename(show_path)
     result = ShowAnalysisResult(show_name)
 
     if args.verbose:
         print(f"\n{'='*10} Analyzing Show: {show_name} {'='*10}")
-    logger.info(f"Starting analysis for show: {show_name} ({show_path})")
+    logger.info("Starting analysis for show: %s (%s)", show_name, show_path)
 
-    result.needs_org = analyze_season_organization(show_path, args)
-    result.season_inconsistencies, result.season_holes = analyze_existing_seasons(show_path, args)
+    # Read the show folder once and share the listing between both checks
+    try:
+        if prefetched is not None:
+            loose_videos, season_folders = prefetched.loose_videos, prefetched.season_folders
+            season_files = prefetched.season_files
+        else:
+            loose_videos, season_folders = _scan_show(show_path)
+            season_files = None
+    except FileNotFoundError:
+        logger.error("Show directory not found during analysis: %s", show_path)
+        result.season_holes = {"error": f"Show directory not found: {show_path}"} # Indicate error
+    except Exception as e:
+        logger.error("Error reading show directory '%s': %s", show_path, e)
+        result.season_holes = {"error": f"Error reading show directory: {e}"} # Indicate error
+    else:
+        result.needs_org, organized = analyze_season_organization(show_path, loose_videos, args)
+        if organized:
+            # Files were just moved into (possibly new) season folders, so the listings are stale
+            try:
+                _, season_folders = _scan_show(show_path)
+                season_files = None
+            except Exception as e:
+                logger.error("Error re-reading show directory '%s' after organization: %s", show_path, e)
+        result.season_inconsistencies, result.season_holes = analyze_existing_seasons(show_path, season_folders, args,
+                                                                                      season_files)
 
     # Determine overall status based on collected details
     result.overall_consistent = not bool(result.season_inconsistencies)
     result.overall_complete = not bool(result.season_holes)
 
     if args.verbose:
-        print(f"\n--- Show Summary: {show_name} ---")
-        print(f"  Needs Season Organization: {'Yes' if result.needs_org else 'No'}")
-        print(f"  Overall Naming Consistency: {'✅ Consistent' if result.overall_consistent else '❌ Inconsistent'}")
-        print(f"  Overall Season Completeness: {'✅ Complete' if result.overall_complete else '❌ Incomplete'}")
+        # One write for the whole block
+        print(f"\n--- Show Summary: {show_name} ---\n"
+              f"  Needs Season Organization: {'Yes' if result.needs_org else 'No'}\n"
+              f"  Overall Naming Consistency: {'✅ Consistent' if result.overall_consistent else '❌ Inconsistent'}\n"
+              f"  Overall Season Completeness: {'✅ Complete' if result.overall_complete else '❌ Incomplete'}")
 
-    logger.info(f"Finished analysis for show: {show_name}. Needs Org: {result.needs_org}, Consistent: {result.overall_consistent}, Complete: {result.overall_complete}")
+    logger.info("Finished analysis for show: %s. Needs Org: %s, Consistent: %s, Complete: %s", show_name, result.needs_org, result.overall_consistent, result.overall_complete)
     return result
 
 
@@ -370,7 +599,15 @@ def setup_logging(args: argparse.Namespace):
             elif args.log_level == 1:
                 # Level 1: Only log critical+ initially, will log summary later
                 file_handler.setLevel(logging.CRITICAL + 1)
-            logger.addHandler(file_handler)
+            # Writes happen on a listener thread so analysis never waits on the log file. Records are
+            # filtered by the queue handler's level when logged, so it carries the file handler's level.
+            log_queue = queue.SimpleQueue()
+            queue_handler = logging.handlers.QueueHandler(log_queue)
+            queue_handler.setLevel(file_handler.level)
+            listener = logging.handlers.QueueListener(log_queue, file_handler)
+            listener.start()
+            atexit.register(listener.stop) # Drains the queue before logging's own shutdown closes the file
+            logger.addHandler(queue_handler)
             print(f"Logging to: {log_filename} (Level: {args.log_level})")
         except Exception as e:
             print(f"Error setting up log file '{log_filename}': {e}")
@@ -420,16 +657,28 @@ def main():
         default=0,
         help="Set log file verbosity: 0=Default (summarized issues), 1=Issues List Only, 2=Disabled."
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Number of threads reading show folders ahead of the analysis (and of shows read ahead)."
+    )
+    parser.add_argument(
+        "--cache-file",
+        default=None,
+        help="Optional: JSON file of results from earlier runs; shows whose folders are unchanged are not re-analyzed "
+             "(ignored for reuse with --interactive)."
+    )
     args = parser.parse_args()
 
     # Setup logging based on args
     setup_logging(args)
 
     library_path = os.path.abspath(args.path)
-    logger.info(f"Script started with args: path={library_path}, show={args.show}, verbose={args.verbose}, interactive={args.interactive}")
+    logger.info("Script started with args: path=%s, show=%s, verbose=%s, interactive=%s", library_path, args.show, args.verbose, args.interactive)
 
     if not os.path.isdir(library_path):
-        logger.error(f"Error: Library path is not a valid directory: {library_path}")
+        logger.error("Error: Library path is not a valid directory: %s", library_path)
         return
 
     shows_to_analyze = []
@@ -438,23 +687,22 @@ def main():
         specific_show_path = os.path.join(library_path, args.show)
         if os.path.isdir(specific_show_path):
             shows_to_analyze.append(specific_show_path)
-            logger.info(f"Targeting specific show: {specific_show_path}")
+            logger.info("Targeting specific show: %s", specific_show_path)
         else:
-            logger.error(f"Error: Specified show folder not found: {specific_show_path}")
+            logger.error("Error: Specified show folder not found: %s", specific_show_path)
             return
     else:
         # Analyze all subdirectories in the library path
-        logger.info(f"Scanning library path for show folders: {library_path}")
+        logger.info("Scanning library path for show folders: %s", library_path)
         try:
-            for item in os.listdir(library_path):
-                item_path = os.path.join(library_path, item)
-                if os.path.isdir(item_path):
-                    # Basic check: avoid hidden folders like .git, .DS_Store etc.
-                    if not item.startswith('.'):
-                         shows_to_analyze.append(item_path)
-            logger.info(f"Found {len(shows_to_analyze)} potential show folders.")
+            # DirEntry.path is already joined onto the (absolute) library path and is passed on as is
+            with os.scandir(library_path) as it:
+                # Basic check: avoid hidden folders like .git, .DS_Store etc. (checked first, it's free)
+                shows_to_analyze = [entry.path for entry in it
+                                    if not entry.name.startswith('.') and entry.is_dir()]
+            logger.info("Found %s potential show folders.", len(shows_to_analyze))
         except Exception as e:
-            logger.error(f"Error reading library directory '{library_path}': {e}")
+            logger.error("Error reading library directory '%s': %s", library_path, e)
             return
 
     if not shows_to_analyze:
@@ -468,16 +716,73 @@ def main():
     total_shows = 0
     all_results: List[ShowAnalysisResult] = [] # Store detailed results
 
-    for show_path in sorted(shows_to_analyze):
+    # Results of unchanged shows can be reused, except in interactive mode where the user must be prompted
+    cached_shows = _load_cache(args.cache_file) if args.cache_file else {}
+    reuse_cache = bool(args.cache_file) and not args.interactive
+    if not args.show:
+        # A full-library run knows every show, so forget the ones deleted or renamed since; entries
+        # for other library paths sharing the cache file are kept
+        current_shows = set(shows_to_analyze)
+        for show_path in [path for path in cached_shows
+                          if os.path.dirname(path) == library_path and path not in current_shows]:
+            del cached_shows[show_path]
+
+    # Directory reads dominate the run time, so worker threads read shows ahead of the analysis.
+    # Shows are still analyzed (and reported, or prompted for) one at a time, in order. Only about
+    # one show per worker is read ahead, which keeps every worker busy without holding listings for
+    # the whole library in memory (or reading it all before an interrupted run can exit).
+    shows_to_analyze.sort()
+    workers = max(1, args.workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def submit_prefetch(show_path: str):
+            cached = cached_shows.get(show_path) if reuse_cache else None
+            return show_path, executor.submit(_prefetch_show, show_path, cached and cached.get("mtimes"),
+                                              bool(args.cache_file))
+
+        remaining_shows = iter(shows_to_analyze)
+        prefetching = deque(submit_prefetch(show_path) for show_path in islice(remaining_shows, workers))
         try:
-            # Pass args down to analysis functions
-            show_result = analyze_show(show_path, args)
-            all_results.append(show_result)
-            total_shows += 1
-            # Overall consistency/completeness tracked within ShowAnalysisResult
-        except Exception as e:
-            show_name = os.path.basename(show_path)
-            logger.exception(f"Unexpected error analyzing show '{show_name}': {e}") # Use logger.exception to include traceback
+            while prefetching:
+                show_path, prefetch_future = prefetching.popleft()
+                next_show = next(remaining_shows, None)
+                if next_show is not None:
+                    prefetching.append(submit_prefetch(next_show))
+                try:
+                    prefetched = prefetch_future.result()
+                    unchanged = prefetched is None
+                except Exception:
+                    prefetched = None # analyze_show reads the folder itself and reports the error
+                    unchanged = False
+                try:
+                    show_result = None
+                    if unchanged:
+                        try:
+                            show_result = ShowAnalysisResult.from_cache(os.path.basename(show_path),
+                                                                        cached_shows[show_path]["result"])
+                            logger.info("Show unchanged since the last run, reusing cached analysis: %s", show_result.show_name)
+                        except (KeyError, TypeError, ValueError, AttributeError) as e:
+                            # A damaged entry only costs a fresh analysis of the show
+                            logger.warning("Ignoring malformed cached analysis for '%s': %s", show_path, e)
+                    if show_result is None:
+                        # Pass args down to analysis functions
+                        show_result = analyze_show(show_path, args, prefetched)
+                        if prefetched is not None and prefetched.mtimes is not None and "error" not in show_result.season_holes:
+                            cached_shows[show_path] = {"mtimes": prefetched.mtimes, "result": show_result.to_cache()}
+                        else:
+                            cached_shows.pop(show_path, None)
+                    all_results.append(show_result)
+                    total_shows += 1
+                    # Overall consistency/completeness tracked within ShowAnalysisResult
+                except Exception as e:
+                    show_name = os.path.basename(show_path)
+                    logger.exception("Unexpected error analyzing show '%s': %s", show_name, e) # Use logger.exception to include traceback
+        except BaseException:
+            # e.g. Ctrl-C at an interactive prompt: drop the queued reads rather than finishing them first
+            executor.shutdown(cancel_futures=True)
+            raise
+
+    if args.cache_file:
+        _save_cache(args.cache_file, cached_shows)
 
     # --- Log Level 1 Output ---
     if args.log_level == 1 and total_shows > 0:
@@ -491,16 +796,18 @@ def main():
                       issues_log.append(f"Incomplete Season: {result.show_name} Season {season_num} ({desc})")
 
         if issues_log:
-            # Find the file handler to write the summary
-            file_handler = next((h for h in logger.handlers if isinstance(h, logging.FileHandler)), None)
+            # Find the handler feeding the log file (see setup_logging) to write the summary
+            file_handler = next((h for h in logger.handlers if isinstance(h, logging.handlers.QueueHandler)), None)
             if file_handler:
                 original_level = file_handler.level
                 try:
                     file_handler.setLevel(logging.INFO) # Ensure INFO level for this summary
-                    logger.info("--- Issues Summary (Log Level 1) ---")
-                    for issue in sorted(issues_log): # Sort the final list
-                        logger.info(issue)
-                    logger.info("--- End Issues Summary ---")
+                    # Emit the summary as one record (like the organization summary) so the file
+                    # handler formats, writes and flushes once rather than once per issue
+                    summary_lines = ["--- Issues Summary (Log Level 1) ---"]
+                    summary_lines.extend(sorted(issues_log)) # Sort the final list
+                    summary_lines.append("--- End Issues Summary ---")
+                    logger.info("\n".join(summary_lines))
                 finally:
                     file_handler.setLevel(original_level) # Reset level if needed
             else: